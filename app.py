@@ -2,69 +2,85 @@
 """
 Sensitive Data Protector - Web UI
 ==================================
-A Flask web application that demonstrates the privacy gateway visually.
-Perfect for taking screenshots for blog posts and documentation.
+A Quart (async Flask) web application that demonstrates the privacy gateway
+visually. Perfect for taking screenshots for blog posts and documentation.
 
 Usage:
     python app.py
     Open http://localhost:5000 in your browser
+
+Production:
+    hypercorn --bind 0.0.0.0:5001 --workers 4 app:app
 """
 
-import os
-from flask import Flask, render_template, request, jsonify
+import asyncio
+import re
+from functools import lru_cache
+from quart import Quart, render_template, request, jsonify
+from quart.utils import run_sync
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from privacy_gateway import PrivacyGateway
 from local_llm_gateway import LocalLLMGateway
+from web_common import (
+    OrjsonProvider, ask_openai, get_openai_client, get_semantic_cache,
+    start_prompt_cache_warmup
+)
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
 
 # Initialize gateways
 regex_gateway = PrivacyGateway()
-local_llm_gateway = None  # Initialized on demand
 
-def get_openai_client():
-    """Get OpenAI client."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or api_key == "your-openai-api-key-here":
-        return None
-    return OpenAI(api_key=api_key)
+# Upper bound on inputs per /process_batch request (each may call OpenAI)
+MAX_BATCH_INPUTS = 50
+
+# Extracts the PII type from a placeholder, e.g. "[CREDIT_CARD_1]" -> "CREDIT_CARD"
+_PLACEHOLDER_RE = re.compile(r'\[([A-Z_]+)_\d+\]')
+
+@lru_cache(maxsize=1)
+def get_local_llm_gateway():
+    """Get the shared local LLM gateway (created once, on first use)."""
+    return LocalLLMGateway()  # Reads from .env
 
 def check_ollama_status():
     """Check if Ollama is available."""
-    global local_llm_gateway
     try:
-        if local_llm_gateway is None:
-            local_llm_gateway = LocalLLMGateway()  # Reads from .env
-        status = local_llm_gateway.get_status()
-        status["model_name"] = local_llm_gateway.model
+        gateway = get_local_llm_gateway()
+        status = gateway.get_status()
+        status["model_name"] = gateway.model
         return status
     except:
         return {"ollama_running": False, "model_available": False, "model_name": "unknown"}
 
+@app.before_serving
+async def init_gateways():
+    """Create the shared local LLM gateway before worker threads can race for it."""
+    gateway = get_local_llm_gateway()
+    # Probe Ollama (so the first page load finds the status cached) while the
+    # semantic cache's embedding model (if enabled) loads
+    await asyncio.gather(
+        run_sync(gateway.get_status)(),
+        run_sync(get_semantic_cache)()
+    )
+    # Seed OpenAI's prompt cache in the background
+    start_prompt_cache_warmup()
+
 @app.route("/")
-def index():
+async def index():
     """Render the main page."""
-    ollama_status = check_ollama_status()
+    ollama_status = await run_sync(check_ollama_status)()
     openai_available = get_openai_client() is not None
-    return render_template("index.html", 
+    return await render_template("index.html", 
                          ollama_status=ollama_status,
                          openai_available=openai_available)
 
-@app.route("/process", methods=["POST"])
-def process():
-    """Process the input text through the privacy gateway."""
-    global local_llm_gateway
-    
-    data = request.json
-    user_input = data.get("input", "")
-    use_local_llm = data.get("use_local_llm", False)
-    call_openai = data.get("call_openai", True)
-    
+async def process_text(user_input: str, use_local_llm: bool = False, call_openai: bool = True) -> dict:
+    """Run one input through detection, masking, OpenAI and unmasking."""
     result = {
         "original_input": user_input,
         "detected_pii": [],
@@ -75,14 +91,21 @@ def process():
         "error": None
     }
     
+    # Cheap checks first: nothing to mask, or nowhere to send the result
+    if not user_input.strip():
+        return result
+    client = get_openai_client() if call_openai else None
+    if call_openai and client is None:
+        result["error"] = "OpenAI API key not configured"
+        return result
+    
     try:
         # Step 1 & 2: Detect and mask PII
         if use_local_llm:
-            if local_llm_gateway is None:
-                local_llm_gateway = LocalLLMGateway()  # Reads from .env
-            
-            # Detect and mask in ONE LLM call (efficient!)
-            detected, masked_input, mapping = local_llm_gateway.detect_and_mask(user_input)
+            # Detect and mask in ONE LLM call (efficient!), off the event loop
+            detected, masked_input, mapping = await run_sync(
+                get_local_llm_gateway().detect_and_mask
+            )(user_input)
             for pii_type, values in detected.items():
                 for value in values:
                     if value:
@@ -94,7 +117,7 @@ def process():
             # Use regex gateway
             masked_input, mapping = regex_gateway.mask(user_input)
             for placeholder, value in mapping.items():
-                pii_type = placeholder.replace("[", "").replace("]", "").rsplit("_", 1)[0]
+                pii_type = _PLACEHOLDER_RE.match(placeholder).group(1)
                 result["detected_pii"].append({
                     "type": pii_type,
                     "value": value
@@ -105,39 +128,19 @@ def process():
         
         # Step 3: Call OpenAI (if requested)
         if call_openai and mapping:  # Only call if there's something masked
-            client = get_openai_client()
-            if client:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """You are a helpful assistant. When you see placeholders 
-                            like [NAME_1], [CREDIT_CARD_1], [EMAIL_1], etc., treat them as actual 
-                            values and refer to them naturally in your response. Keep the placeholders 
-                            in your response so they can be unmasked later. Keep your response concise."""
-                        },
-                        {
-                            "role": "user",
-                            "content": masked_input
-                        }
-                    ],
-                    max_tokens=300,
-                    temperature=0.7
+            result["ai_response_masked"] = await ask_openai(
+                client, masked_input, use_semantic_cache=use_local_llm
+            )
+            
+            # Step 4: Unmask the response
+            if use_local_llm:
+                result["ai_response_unmasked"] = get_local_llm_gateway().unmask(
+                    result["ai_response_masked"], mapping
                 )
-                result["ai_response_masked"] = response.choices[0].message.content
-                
-                # Step 4: Unmask the response
-                if use_local_llm:
-                    result["ai_response_unmasked"] = local_llm_gateway.unmask(
-                        result["ai_response_masked"], mapping
-                    )
-                else:
-                    result["ai_response_unmasked"] = regex_gateway.unmask(
-                        result["ai_response_masked"], mapping
-                    )
             else:
-                result["error"] = "OpenAI API key not configured"
+                result["ai_response_unmasked"] = regex_gateway.unmask(
+                    result["ai_response_masked"], mapping
+                )
         elif call_openai and not mapping:
             result["ai_response_masked"] = "No PII detected - nothing to demonstrate"
             result["ai_response_unmasked"] = result["ai_response_masked"]
@@ -145,13 +148,46 @@ def process():
     except Exception as e:
         result["error"] = str(e)
     
+    return result
+
+@app.route("/process", methods=["POST"])
+async def process():
+    """Process the input text through the privacy gateway."""
+    data = await request.get_json()
+    result = await process_text(
+        data.get("input", ""),
+        use_local_llm=data.get("use_local_llm", False),
+        call_openai=data.get("call_openai", True)
+    )
     return jsonify(result)
 
+@app.route("/process_batch", methods=["POST"])
+async def process_batch():
+    """Process several inputs concurrently, fanning out the OpenAI calls."""
+    data = await request.get_json()
+    inputs = data.get("inputs", [])
+    if (not isinstance(inputs, list) or len(inputs) > MAX_BATCH_INPUTS
+            or not all(isinstance(user_input, str) for user_input in inputs)):
+        return jsonify({
+            "results": [],
+            "error": f"'inputs' must be a list of at most {MAX_BATCH_INPUTS} texts"
+        }), 400
+    
+    results = await asyncio.gather(*(
+        process_text(
+            user_input,
+            use_local_llm=data.get("use_local_llm", False),
+            call_openai=data.get("call_openai", True)
+        )
+        for user_input in inputs
+    ))
+    return jsonify({"results": results, "error": None})
+
 @app.route("/status")
-def status():
+async def status():
     """Check system status."""
     return jsonify({
-        "ollama": check_ollama_status(),
+        "ollama": await run_sync(check_ollama_status)(),
         "openai": get_openai_client() is not None
     })
 
@@ -2,48 +2,54 @@
 """
 Sensitive Data Protector - Simple Web UI (Regex Only)
 ======================================================
-A streamlined Flask web application that demonstrates the privacy gateway
-using fast regex-based PII detection. No Ollama required.
+A streamlined Quart (async Flask) web application that demonstrates the
+privacy gateway using fast regex-based PII detection. No Ollama required.
 
 Usage:
     python app_simple.py
     Open http://localhost:5002 in your browser
+
+Production:
+    hypercorn --bind 0.0.0.0:5002 --workers 4 app_simple:app
 """
 
-import os
-from flask import Flask, render_template, request, jsonify
+import asyncio
+import re
+from quart import Quart, render_template, request, jsonify
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from privacy_gateway import PrivacyGateway
+from web_common import OrjsonProvider, ask_openai, get_openai_client, start_prompt_cache_warmup
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
+app = Quart(__name__, template_folder='templates', static_folder='static')
+app.json = OrjsonProvider(app)
 
 # Initialize gateway
 gateway = PrivacyGateway()
 
-def get_openai_client():
-    """Get OpenAI client."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key or api_key == "your-openai-api-key-here":
-        return None
-    return OpenAI(api_key=api_key)
+# Upper bound on inputs per /process_batch request (each may call OpenAI)
+MAX_BATCH_INPUTS = 50
+
+# Extracts the PII type from a placeholder, e.g. "[CREDIT_CARD_1]" -> "CREDIT_CARD"
+_PLACEHOLDER_RE = re.compile(r'\[([A-Z_]+)_\d+\]')
+
+@app.before_serving
+async def init_caches():
+    """Prepare the caches before the first request."""
+    # Seed OpenAI's prompt cache in the background
+    start_prompt_cache_warmup()
 
 @app.route("/")
-def index():
+async def index():
     """Render the main page."""
     openai_available = get_openai_client() is not None
-    return render_template("index_simple.html", openai_available=openai_available)
+    return await render_template("index_simple.html", openai_available=openai_available)
 
-@app.route("/process", methods=["POST"])
-def process():
-    """Process the input text through the privacy gateway."""
-    data = request.json
-    user_input = data.get("input", "")
-    
+async def process_text(user_input: str) -> dict:
+    """Run one input through masking, OpenAI and unmasking."""
     result = {
         "original_input": user_input,
         "detected_pii": [],
@@ -54,12 +60,20 @@ def process():
         "error": None
     }
     
+    # Cheap checks first: nothing to mask, or nowhere to send the result
+    if not user_input.strip():
+        return result
+    client = get_openai_client()
+    if client is None:
+        result["error"] = "OpenAI API key not configured"
+        return result
+    
     try:
         # Step 1 & 2: Detect and mask PII using regex
         masked_input, mapping = gateway.mask(user_input)
         
         for placeholder, value in mapping.items():
-            pii_type = placeholder.replace("[", "").replace("]", "").rsplit("_", 1)[0]
+            pii_type = _PLACEHOLDER_RE.match(placeholder).group(1)
             result["detected_pii"].append({
                 "type": pii_type,
                 "value": value
@@ -70,34 +84,12 @@ def process():
         
         # Step 3: Call OpenAI
         if mapping:
-            client = get_openai_client()
-            if client:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": """You are a helpful assistant. When you see placeholders 
-                            like [NAME_1], [CREDIT_CARD_1], [EMAIL_1], etc., treat them as actual 
-                            values and refer to them naturally in your response. Keep the placeholders 
-                            in your response so they can be unmasked later. Keep your response concise."""
-                        },
-                        {
-                            "role": "user",
-                            "content": masked_input
-                        }
-                    ],
-                    max_tokens=300,
-                    temperature=0.7
-                )
-                result["ai_response_masked"] = response.choices[0].message.content
-                
-                # Step 4: Unmask the response
-                result["ai_response_unmasked"] = gateway.unmask(
-                    result["ai_response_masked"], mapping
-                )
-            else:
-                result["error"] = "OpenAI API key not configured"
+            result["ai_response_masked"] = await ask_openai(client, masked_input)
+            
+            # Step 4: Unmask the response
+            result["ai_response_unmasked"] = gateway.unmask(
+                result["ai_response_masked"], mapping
+            )
         else:
             result["ai_response_masked"] = "No PII detected in input."
             result["ai_response_unmasked"] = result["ai_response_masked"]
@@ -105,8 +97,30 @@ def process():
     except Exception as e:
         result["error"] = str(e)
     
+    return result
+
+@app.route("/process", methods=["POST"])
+async def process():
+    """Process the input text through the privacy gateway."""
+    data = await request.get_json()
+    result = await process_text(data.get("input", ""))
     return jsonify(result)
 
+@app.route("/process_batch", methods=["POST"])
+async def process_batch():
+    """Process several inputs concurrently, fanning out the OpenAI calls."""
+    data = await request.get_json()
+    inputs = data.get("inputs", [])
+    if (not isinstance(inputs, list) or len(inputs) > MAX_BATCH_INPUTS
+            or not all(isinstance(user_input, str) for user_input in inputs)):
+        return jsonify({
+            "results": [],
+            "error": f"'inputs' must be a list of at most {MAX_BATCH_INPUTS} texts"
+        }), 400
+    
+    results = await asyncio.gather(*(process_text(user_input) for user_input in inputs))
+    return jsonify({"results": results, "error": None})
+
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("🛡️  Sensitive Data Protector - Simple UI (Regex)")
@@ -0,0 +1,61 @@
+"""
+Response Cache
+==============
+A small, thread-safe LRU cache for reusing AI responses and local PII
+detection results.
+
+The web apps key OpenAI responses on masked text only, so that cache never
+holds PII: a cached response still contains placeholders and is unmasked
+with the mapping of the request that hits it. LocalLLMGateway's detection
+cache does hold PII, in process memory only, just like the mapping itself.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def cache_key(*parts: str) -> str:
+    """Build a compact, fixed-size cache key from the given strings."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")  # Separator so ("ab", "c") != ("a", "bc")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    A bounded mapping that evicts the least recently used entry when full.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        """Return the cached value for `key` (marking it recently used)."""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: str, value: Any):
+        """Store `value` under `key`, evicting the oldest entry if needed."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -15,15 +15,100 @@ Configuration (via .env file):
 This demonstrates "Strategy 2: Local LLM for Sensitive Processing" from the blog.
 """
 
-import json
 import os
 import re
-import requests
+import time
+from itertools import repeat
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Tuple, Optional
 
+from cache import LRUCache, cache_key
+from privacy_gateway import multi_replace
+
 # Default configuration
 DEFAULT_OLLAMA_MODEL = "llama3.1:8b"
 DEFAULT_OLLAMA_URL = "http://localhost:11434"
+DEFAULT_STATUS_TTL = 30  # Seconds to reuse a cached Ollama status check
+DEFAULT_CACHE_SIZE = 256  # Detection results kept for repeated inputs
+
+# Inputs longer than this are split into chunks and detected concurrently
+MAX_DETECT_CHARS = 8000
+# detect_and_mask has the LLM echo the whole (JSON-escaped) text plus a
+# mapping, which must fit in the 2000-token num_predict; longer inputs are
+# detected and then masked locally instead
+MAX_ECHO_CHARS = 2000
+DETECT_CHUNK_CHARS = 2000
+DETECT_WORKERS = 4  # Also the size of the HTTP connection pool
+
+# Detected values the local LLM is less sure about than this are ignored
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+# Matches a placeholder and captures its type, e.g. "[NAMES_1]" -> "NAMES"
+_PLACEHOLDER_RE = re.compile(r'\[([A-Z_]+)_\d+\]')
+
+# Whitespace following the end of a sentence
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _split_into_chunks(text: str, max_chars: int) -> list:
+    """
+    Split text on sentence boundaries into chunks of at most `max_chars`.
+    
+    A single sentence longer than `max_chars` becomes its own chunk rather
+    than being cut, so PII values are never split across chunks. Chunks are
+    slices of `text`, so the whitespace inside them is kept exactly and the
+    values the LLM reports can be found in the original text.
+    """
+    # (end of sentence, start of the next one) for every sentence break
+    breaks = [(match.start(), match.end()) for match in _SENTENCE_BREAK_RE.finditer(text)]
+    breaks.append((len(text), len(text)))
+    
+    chunks = []
+    start = end = 0  # The current chunk is text[start:end]
+    sentence_start = 0
+    for sentence_end, next_start in breaks:
+        if end > start and sentence_end - start > max_chars:
+            chunks.append(text[start:end])
+            start = sentence_start
+        end = sentence_end
+        sentence_start = next_start
+    if end > start:
+        chunks.append(text[start:end])
+    return chunks
+
+
+class _JsonObjectTracker:
+    """Tracks brace depth across streamed text to spot the end of a JSON object."""
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, fragment: str) -> bool:
+        """Consume more text; return True once the first JSON object is closed."""
+        for char in fragment:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                # Braces inside JSON strings don't count
+                self.in_string = self.started
+            elif char == "{":
+                self.depth += 1
+                self.started = True
+            elif char == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
 
 
 class LocalLLMGateway:
@@ -32,45 +117,76 @@ class LocalLLMGateway:
     PII detection and masking before sending data to external AI APIs.
     """
 
-    def __init__(self, model: str = None, ollama_url: str = None):
+    def __init__(self, model: str = None, ollama_url: str = None,
+                 status_ttl: float = DEFAULT_STATUS_TTL,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
         """
         Initialize the Local LLM Gateway.
         
         Args:
             model: The Ollama model to use (reads from OLLAMA_MODEL env var if not provided)
             ollama_url: The Ollama API endpoint (reads from OLLAMA_URL env var if not provided)
+            status_ttl: Seconds to cache the result of get_status()
+            cache_size: Number of detect_pii/detect_and_mask results to cache
         """
         # Read from environment variables with fallback to defaults
         self.model = model or os.getenv("OLLAMA_MODEL", DEFAULT_OLLAMA_MODEL)
         self.ollama_url = ollama_url or os.getenv("OLLAMA_URL", DEFAULT_OLLAMA_URL)
         self.mapping: Dict[str, str] = {}
+        self.status_ttl = status_ttl
+        # (monotonic timestamp, status dict) of the last Ollama probe
+        self._status_cache: Optional[Tuple[float, Dict[str, bool]]] = None
+        # Detection results by input text hash, so repeated inputs skip the LLM.
+        # Kept in process memory only, like the mapping itself.
+        self._result_cache = LRUCache(maxsize=cache_size)
+        # Persistent client so Ollama calls reuse pooled keep-alive connections;
+        # HTTP/2 (when Ollama sits behind a TLS proxy) multiplexes concurrent calls
+        self._client = httpx.Client(
+            http2=True,
+            timeout=120,  # Local models can be slow
+            limits=httpx.Limits(
+                max_connections=DETECT_WORKERS,
+                max_keepalive_connections=DETECT_WORKERS
+            )
+        )
 
-    def _check_ollama_available(self) -> bool:
-        """Check if Ollama is running and accessible."""
+    def _probe_ollama(self) -> Dict[str, bool]:
+        """
+        Check if Ollama is running and the model is available.
+        
+        Both answers come from a single /api/tags request.
+        """
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except requests.exceptions.RequestException:
-            return False
-
-    def _check_model_available(self) -> bool:
-        """Check if the specified model is available in Ollama."""
+            response = self._client.get(f"{self.ollama_url}/api/tags", timeout=5)
+        except httpx.HTTPError:
+            return {"ollama_running": False, "model_available": False}
+        
+        if response.status_code != 200:
+            return {"ollama_running": False, "model_available": False}
+        
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                return any(m.get("name", "").startswith(self.model) for m in models)
-            return False
-        except requests.exceptions.RequestException:
-            return False
+            models = orjson.loads(response.content).get("models", [])
+        except ValueError:
+            models = []
+        return {
+            "ollama_running": True,
+            "model_available": any(m.get("name", "").startswith(self.model) for m in models)
+        }
 
-    def _call_ollama(self, prompt: str, system_prompt: str = "") -> str:
+    def _call_ollama(self, prompt: str, system_prompt: str = "",
+                     json_mode: bool = False) -> str:
         """
         Call the local Ollama model.
         
+        The response is streamed. With `json_mode`, Ollama's native JSON
+        format constrains the output to a JSON object, and reading stops as
+        soon as that object is complete instead of waiting for the model to
+        run out of tokens (`num_predict` remains the hard cap).
+        
         Args:
             prompt: The user prompt
             system_prompt: Optional system prompt
+            json_mode: Generate a JSON object and stop once it is complete
             
         Returns:
             The model's response text
@@ -78,7 +194,7 @@ class LocalLLMGateway:
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": 0.1,  # Low temperature for consistent output
                 "num_predict": 2000
@@ -87,28 +203,84 @@ class LocalLLMGateway:
         
         if system_prompt:
             payload["system"] = system_prompt
+        if json_mode:
+            payload["format"] = "json"
         
+        tracker = _JsonObjectTracker() if json_mode else None
+        parts = []
         try:
-            response = requests.post(
+            with self._client.stream(
+                "POST",
                 f"{self.ollama_url}/api/generate",
-                json=payload,
-                timeout=120  # Local models can be slow
-            )
-            response.raise_for_status()
-            return response.json().get("response", "")
-        except requests.exceptions.RequestException as e:
+                json=payload
+            ) as response:
+                response.raise_for_status()
+                # No chunk_size (unlike requests' iter_lines): httpx already
+                # reads up to 64 KiB per socket read and yields whatever has
+                # arrived, whereas iter_bytes(chunk_size=...) would hold data
+                # back until a full chunk is buffered, delaying the early stop
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    fragment = chunk.get("response", "")
+                    parts.append(fragment)
+                    # Closing the response early makes Ollama stop generating
+                    if chunk.get("done") or (tracker and tracker.feed(fragment)):
+                        break
+        except httpx.HTTPError as e:
             raise RuntimeError(f"Failed to call Ollama: {e}")
+        
+        return "".join(parts)
 
-    def detect_pii(self, text: str) -> Dict[str, list]:
+    def detect_pii(self, text: str,
+                   min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> Dict[str, list]:
         """
         Use the local LLM to detect PII in the text.
         
+        The LLM scores each value it reports; values scored below
+        `min_confidence` are treated as false positives and dropped.
+        
+        Texts longer than MAX_DETECT_CHARS are split on sentence boundaries
+        and the chunks are analyzed concurrently, keeping per-call latency
+        bounded. Results are merged with duplicates removed.
+        
+        Results are cached per text, so the returned dict may be shared
+        with later calls and should not be modified.
+        
         Args:
             text: The input text to analyze
+            min_confidence: Minimum confidence (0-1) for a value to be kept
             
         Returns:
             A dictionary of detected PII by type
         """
+        key = cache_key("detect_pii", self.model, str(min_confidence), text)
+        detected_pii = self._result_cache.get(key)
+        if detected_pii is None:
+            if len(text) <= MAX_DETECT_CHARS:
+                detected_pii = self._detect_pii_chunk(text, min_confidence)
+            else:
+                detected_pii = self._detect_pii_chunked(text, min_confidence)
+            self._result_cache.put(key, detected_pii)
+        return detected_pii
+
+    def _detect_pii_chunked(self, text: str, min_confidence: float) -> Dict[str, list]:
+        """Detect PII in a long text by analyzing its chunks concurrently."""
+        chunks = _split_into_chunks(text, DETECT_CHUNK_CHARS)
+        with ThreadPoolExecutor(max_workers=DETECT_WORKERS) as executor:
+            results = list(executor.map(self._detect_pii_chunk, chunks, repeat(min_confidence)))
+        
+        merged: Dict[str, dict] = {}
+        for result in results:
+            for pii_type, values in result.items():
+                if isinstance(values, list):
+                    # dict keys keep first-seen order while de-duplicating
+                    merged.setdefault(pii_type, {}).update(dict.fromkeys(values))
+        return {pii_type: list(values) for pii_type, values in merged.items()}
+
+    def _detect_pii_chunk(self, text: str, min_confidence: float) -> Dict[str, list]:
+        """Detect PII in a single piece of text with one LLM call."""
         system_prompt = """You are a PII (Personally Identifiable Information) detector.
 Your job is to identify sensitive data in text and return it in a structured JSON format.
 
@@ -124,18 +296,20 @@ Detect these types of PII:
 
 Return ONLY valid JSON in this exact format (no other text):
 {
-    "credit_cards": ["list of detected credit card numbers"],
-    "ssn": ["list of detected SSN"],
-    "emails": ["list of detected emails"],
-    "phones": ["list of detected phone numbers"],
-    "names": ["list of detected person names"],
-    "addresses": ["list of detected addresses"],
-    "dates_of_birth": ["list of detected birth dates"],
-    "account_numbers": ["list of detected account numbers"]
+    "credit_cards": [{"value": "detected credit card number", "confidence": 0.95}],
+    "ssn": [{"value": "detected SSN", "confidence": 0.95}],
+    "emails": [{"value": "detected email", "confidence": 0.95}],
+    "phones": [{"value": "detected phone number", "confidence": 0.95}],
+    "names": [{"value": "detected person name", "confidence": 0.95}],
+    "addresses": [{"value": "detected address", "confidence": 0.95}],
+    "dates_of_birth": [{"value": "detected birth date", "confidence": 0.95}],
+    "account_numbers": [{"value": "detected account number", "confidence": 0.95}]
 }
 
+"confidence" is a number from 0 to 1: how sure you are that the value is real PII.
 If no PII is found for a category, use an empty list [].
-Only include actual PII found in the text, not placeholders or examples."""
+Only include actual PII found in the text, not placeholders or examples.
+Text in square brackets such as [EMAIL_1] has already been masked; ignore it."""
 
         prompt = f"""Analyze this text and identify all PII (Personally Identifiable Information).
 Return ONLY the JSON result, no explanation.
@@ -147,64 +321,216 @@ Text to analyze:
 
 JSON result:"""
 
-        response = self._call_ollama(prompt, system_prompt)
+        response = self._call_ollama(prompt, system_prompt, json_mode=True)
+        result = self._parse_json(response)
         
-        # Parse the JSON response
+        detected: Dict[str, list] = {}
+        for pii_type, entries in result.items():
+            if not isinstance(entries, list):
+                continue
+            values = []
+            for entry in entries:
+                if isinstance(entry, dict):
+                    value = entry.get("value")
+                    confidence = entry.get("confidence", 1.0)
+                else:
+                    # A bare value without a score is taken at face value
+                    value, confidence = entry, 1.0
+                if (isinstance(value, str) and value
+                        and isinstance(confidence, (int, float))
+                        and confidence >= min_confidence):
+                    values.append(value)
+            detected[pii_type] = values
+        return detected
+
+    def _parse_json(self, response: str) -> dict:
+        """
+        Parse a JSON-mode LLM response.
+        
+        Raises RuntimeError on malformed output rather than returning an
+        empty result, which would let unmasked PII through.
+        """
         try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{[\s\S]*\}', response)
-            if json_match:
-                return json.loads(json_match.group())
-            return {}
-        except json.JSONDecodeError:
-            # If parsing fails, return empty dict
-            return {}
-
-    def mask(self, text: str, detected_pii: Dict[str, list] = None) -> Tuple[str, Dict[str, str]]:
+            result = orjson.loads(response)
+        except orjson.JSONDecodeError as e:
+            raise RuntimeError(f"Local LLM returned invalid JSON: {e}")
+        if not isinstance(result, dict):
+            raise RuntimeError("Local LLM returned JSON that is not an object")
+        return result
+
+    def mask(self, text: str, detected_pii: Dict[str, list] = None,
+             reserved: Dict[str, str] = None) -> Tuple[str, Dict[str, str]]:
         """
         Use the local LLM to detect and mask all PII in the text.
         
+        Values containing a placeholder (text masked by an earlier pass) are
+        never masked again.
+        
         Args:
             text: The input text potentially containing sensitive data
             detected_pii: Optional pre-detected PII dict (to avoid calling LLM again)
+            reserved: Optional placeholders already used in `text` (e.g. by
+                      the regex PrivacyGateway); numbering skips them
             
         Returns:
             A tuple of (masked_text, mapping_dict)
         """
-        self.mapping = {}
+        mapping = {}  # Built locally so concurrent calls can't interleave
         
         # Detect PII using local LLM (skip if already provided)
         if detected_pii is None:
             detected_pii = self.detect_pii(text)
         
-        masked_text = text
-        counters = {}
+        placeholders = {}  # {original_value: placeholder}
         
-        # Create mappings and replace PII with placeholders
+        # Split the text around existing placeholders: only the gaps are
+        # masked, so e.g. "PHONE_1" inside "[PHONE_1]" is never replaced
+        gaps = []
+        existing = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            gaps.append(text[pos:match.start()])
+            existing.append(match.group())
+            pos = match.end()
+        gaps.append(text[pos:])
+        
+        # Create mappings for every detected value present outside a placeholder
         for pii_type, values in detected_pii.items():
             if not values:
                 continue
                 
-            counters[pii_type] = 0
+            prefix = f"[{pii_type.upper()}_"  # Built once per type
+            count = 0
             for value in values:
-                if value and value in masked_text:
-                    counters[pii_type] += 1
-                    placeholder = f"[{pii_type.upper()}_{counters[pii_type]}]"
-                    self.mapping[placeholder] = value
-                    masked_text = masked_text.replace(value, placeholder)
+                if (value and value not in placeholders
+                        and not _PLACEHOLDER_RE.search(value)
+                        and any(value in gap for gap in gaps)):
+                    count += 1
+                    placeholder = f"{prefix}{count}]"
+                    while reserved and placeholder in reserved:
+                        count += 1
+                        placeholder = f"{prefix}{count}]"
+                    placeholders[value] = placeholder
+                    mapping[placeholder] = value
+        
+        # Replace all values in a single pass per gap (longer values win over substrings)
+        masked_gaps = [multi_replace(gap, placeholders) for gap in gaps]
+        masked_text = "".join(
+            gap + placeholder for gap, placeholder in zip(masked_gaps, existing)
+        ) + masked_gaps[-1]
         
-        return masked_text, self.mapping.copy()
+        # A fresh dict is built on every call, so it can be shared without copying
+        self.mapping = mapping
+        return masked_text, mapping
     
-    def detect_and_mask(self, text: str) -> Tuple[Dict[str, list], str, Dict[str, str]]:
+    def detect_and_mask(self, text: str, verify: bool = True) -> Tuple[Dict[str, list], str, Dict[str, str]]:
         """
         Detect PII and mask in a single operation (efficient - only one LLM call).
         
+        The local LLM returns the masked text and the mapping directly, so no
+        separate replace pass is needed. With `verify`, mapping values must
+        appear in the original text and the masked text must unmask back to
+        the original with no PII left in it; otherwise the reported values are
+        masked locally instead.
+        
+        Texts longer than MAX_ECHO_CHARS, and responses that are not valid
+        JSON (e.g. cut off at `num_predict`), fall back to detect_pii()
+        followed by a local mask().
+        
+        Results are cached per text, so the returned values may be shared
+        with later calls and should not be modified.
+        
         Args:
             text: The input text potentially containing sensitive data
+            verify: Check the LLM's masked text against the original
             
         Returns:
             A tuple of (detected_pii, masked_text, mapping_dict)
         """
+        key = cache_key("detect_and_mask", self.model, str(verify), text)
+        result = self._result_cache.get(key)
+        if result is None:
+            result = self._detect_and_mask(text, verify)
+            self._result_cache.put(key, result)
+        self.mapping = result[2]
+        return result
+
+    def _detect_and_mask(self, text: str, verify: bool) -> Tuple[Dict[str, list], str, Dict[str, str]]:
+        """Run detect_and_mask with the local LLM, bypassing the cache."""
+        if len(text) > MAX_ECHO_CHARS:
+            # Too long to echo back in one response
+            return self._detect_then_mask(text)
+        
+        system_prompt = """You are a PII (Personally Identifiable Information) masker.
+Your job is to replace sensitive data in text with placeholders and return the result as JSON.
+
+Mask these types of PII, using the placeholder prefix shown:
+- CREDIT_CARDS: Credit/debit card numbers
+- SSN: Social Security Numbers
+- EMAILS: Email addresses
+- PHONES: Phone numbers
+- NAMES: Person names (full names or first+last names)
+- ADDRESSES: Physical addresses
+- DATES_OF_BIRTH: Birth dates
+- ACCOUNT_NUMBERS: Bank account or other account numbers
+
+Number placeholders per type starting at 1, e.g. [NAMES_1], [NAMES_2], [EMAILS_1].
+Reuse the same placeholder when the same value appears more than once.
+Copy all other text exactly as it is, including whitespace and punctuation.
+
+Return ONLY valid JSON in this exact format (no other text):
+{
+    "masked_text": "the input text with every PII value replaced by its placeholder",
+    "mapping": {"[NAMES_1]": "original value", "[EMAILS_1]": "original value"}
+}
+
+If no PII is found, return the text unchanged and an empty mapping {}."""
+
+        prompt = f"""Mask all PII (Personally Identifiable Information) in this text.
+Return ONLY the JSON result, no explanation.
+
+Text to mask:
+---
+{text}
+---
+
+JSON result:"""
+
+        response = self._call_ollama(prompt, system_prompt, json_mode=True)
+        try:
+            result = self._parse_json(response)
+        except RuntimeError:
+            # Cut off at num_predict or otherwise malformed
+            return self._detect_then_mask(text)
+        masked_text = result.get("masked_text")
+        raw_mapping = result.get("mapping")
+        if not isinstance(raw_mapping, dict):
+            raw_mapping = {}
+        
+        # Keep well-formed entries; with verify, drop hallucinated values
+        mapping = {
+            placeholder: value
+            for placeholder, value in raw_mapping.items()
+            if isinstance(value, str) and value and _PLACEHOLDER_RE.fullmatch(placeholder)
+            and (not verify or value in text)
+        }
+        
+        detected_pii: Dict[str, list] = {}
+        for placeholder, value in mapping.items():
+            pii_type = _PLACEHOLDER_RE.fullmatch(placeholder).group(1).lower()
+            detected_pii.setdefault(pii_type, []).append(value)
+        
+        if not isinstance(masked_text, str) or (verify and (
+            any(value in masked_text for value in mapping.values())
+            or multi_replace(masked_text, mapping) != text
+        )):
+            # The LLM altered the text or left PII behind - mask locally instead
+            masked_text, mapping = self.mask(text, detected_pii)
+        
+        return detected_pii, masked_text, mapping
+
+    def _detect_then_mask(self, text: str) -> Tuple[Dict[str, list], str, Dict[str, str]]:
+        """Detect PII (in chunks if needed) and mask it locally: two steps, no echo."""
         detected_pii = self.detect_pii(text)
         masked_text, mapping = self.mask(text, detected_pii)
         return detected_pii, masked_text, mapping
@@ -223,23 +549,46 @@ JSON result:"""
         if mapping is None:
             mapping = self.mapping
         
-        unmasked_text = text
-        for placeholder, original in mapping.items():
-            unmasked_text = unmasked_text.replace(placeholder, original)
+        return multi_replace(text, mapping)
+
+    def warm_up(self) -> bool:
+        """
+        Load the model into Ollama's memory ahead of the first real request.
+        
+        Ollama loads a model on its first generate call, which can take
+        several seconds. A request without a prompt only loads the model.
+        Failures are ignored; the next real call simply loads it instead.
         
-        return unmasked_text
+        Returns:
+            True if Ollama confirmed the model is loaded
+        """
+        try:
+            response = self._client.post(
+                f"{self.ollama_url}/api/generate",
+                json={"model": self.model, "stream": False}
+            )
+        except httpx.HTTPError:
+            return False
+        return response.status_code == 200
 
     def get_status(self) -> Dict[str, bool]:
         """
         Check the status of Ollama and the model.
         
+        The result is cached for `status_ttl` seconds, so repeated calls
+        (e.g. on every page load) don't hit Ollama each time.
+        
         Returns:
             Dict with 'ollama_running' and 'model_available' status
         """
-        return {
-            "ollama_running": self._check_ollama_available(),
-            "model_available": self._check_model_available()
-        }
+        now = time.monotonic()
+        cached = self._status_cache
+        if cached is not None and now - cached[0] < self.status_ttl:
+            return dict(cached[1])
+        
+        status = self._probe_ollama()
+        self._status_cache = (now, status)
+        return dict(status)
 
 
 def demonstrate_local_llm_masking():
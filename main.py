@@ -18,10 +18,12 @@ Environment Variables:
 
 import os
 import sys
+from typing import Iterator
 from dotenv import load_dotenv
 from openai import OpenAI
 
-from privacy_gateway import PrivacyGateway
+from privacy_gateway import PrivacyGateway, unmask_stream
+from prompts import ADVISOR_PROMPT
 
 
 def print_header():
@@ -63,18 +65,15 @@ Can you help me understand if this charge is legitimate and what I should do?
     return user_input
 
 
-def call_openai_api(client: OpenAI, masked_prompt: str) -> str:
-    """Send the masked prompt to OpenAI and return the response."""
+def stream_openai_api(client: OpenAI, masked_prompt: str) -> Iterator[str]:
+    """Send the masked prompt to OpenAI and yield the response as it is generated."""
     try:
-        response = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model="gpt-4o-mini",  # Using a cost-effective model for demo
             messages=[
                 {
                     "role": "system",
-                    "content": """You are a helpful financial advisor assistant. 
-                    When you see placeholders like [NAME_1], [CREDIT_CARD_1], [EMAIL_1], etc., 
-                    treat them as actual values and refer to them naturally in your response.
-                    Keep the placeholders in your response so they can be unmasked later."""
+                    "content": ADVISOR_PROMPT
                 },
                 {
                     "role": "user",
@@ -82,11 +81,14 @@ def call_openai_api(client: OpenAI, masked_prompt: str) -> str:
                 }
             ],
             max_tokens=500,
-            temperature=0.7
+            temperature=0.7,
+            stream=True
         )
-        return response.choices[0].message.content
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     except Exception as e:
-        return f"Error calling OpenAI API: {str(e)}"
+        yield f"Error calling OpenAI API: {str(e)}"
 
 
 def run_demo():
@@ -140,18 +142,26 @@ def run_demo():
     print("=" * 70)
     print("\n⏳ Sending masked prompt to OpenAI...")
     
-    ai_response = call_openai_api(client, masked_prompt)
+    # The response is unmasked and printed while it is still being generated
+    ai_response_parts = []
     
-    print_section("AI RESPONSE (with placeholders)", ai_response, "🤖")
+    def received():
+        for piece in stream_openai_api(client, masked_prompt):
+            ai_response_parts.append(piece)
+            yield piece
     
     # Step 3: Unmask the response
     print("\n" + "=" * 70)
-    print("STEP 3: UNMASKING RESPONSE")
+    print("STEP 3: UNMASKING RESPONSE AS IT STREAMS")
     print("=" * 70)
     
-    final_response = gateway.unmask(ai_response, mapping)
+    print("\n✨ FINAL RESPONSE (restored for user)")
+    print("-" * 50)
+    for text in unmask_stream(received(), mapping):
+        print(text, end="", flush=True)
+    print()
     
-    print_section("FINAL RESPONSE (restored for user)", final_response, "✨")
+    print_section("AI RESPONSE (with placeholders, as sent by OpenAI)", "".join(ai_response_parts), "🤖")
     
     # Summary
     print("\n" + "=" * 70)
@@ -8,7 +8,8 @@ This is "Strategy 2" from the blog: Use a local LLM to handle sensitive data pro
 and only send anonymized data to powerful external APIs.
 
 Architecture:
-    User Input → Local LLM (Ollama) → Mask PII → OpenAI API → Unmask → User
+    User Input → Regex (structured PII) → Local LLM (Ollama, contextual PII)
+               → Mask PII → OpenAI API → Unmask → User
 
 Requirements:
     - Ollama installed and running: https://ollama.ai
@@ -21,10 +22,15 @@ Usage:
 
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 from dotenv import load_dotenv
 from openai import OpenAI
 
 from local_llm_gateway import LocalLLMGateway
+from privacy_gateway import PrivacyGateway, unmask_stream
+from prompts import ADVISOR_PROMPT
 
 
 def print_header():
@@ -46,12 +52,10 @@ def print_section(title: str, content: str, emoji: str = ""):
     print(content)
 
 
-def check_prerequisites(gateway: LocalLLMGateway) -> bool:
-    """Check if Ollama and the model are available."""
+def check_prerequisites(gateway: LocalLLMGateway, status: dict) -> bool:
+    """Check if Ollama and the model are available, given the gateway's status."""
     print("🔍 Checking prerequisites...")
     
-    status = gateway.get_status()
-    
     print(f"   Ollama running: {'✅ Yes' if status['ollama_running'] else '❌ No'}")
     
     if not status['ollama_running']:
@@ -97,18 +101,15 @@ Can you help me understand if this charge is legitimate and what I should do?
     return user_input
 
 
-def call_openai_api(client: OpenAI, masked_prompt: str) -> str:
-    """Send the masked prompt to OpenAI and return the response."""
+def stream_openai_api(client: OpenAI, masked_prompt: str) -> Iterator[str]:
+    """Send the masked prompt to OpenAI and yield the response as it is generated."""
     try:
-        response = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
                     "role": "system",
-                    "content": """You are a helpful financial advisor assistant. 
-                    When you see placeholders like [NAMES_1], [CREDIT_CARDS_1], [EMAILS_1], etc., 
-                    treat them as actual values and refer to them naturally in your response.
-                    Keep the placeholders in your response so they can be unmasked later."""
+                    "content": ADVISOR_PROMPT
                 },
                 {
                     "role": "user",
@@ -116,11 +117,14 @@ def call_openai_api(client: OpenAI, masked_prompt: str) -> str:
                 }
             ],
             max_tokens=500,
-            temperature=0.7
+            temperature=0.7,
+            stream=True
         )
-        return response.choices[0].message.content
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     except Exception as e:
-        return f"Error calling OpenAI API: {str(e)}"
+        yield f"Error calling OpenAI API: {str(e)}"
 
 
 def run_demo():
@@ -128,6 +132,13 @@ def run_demo():
     # Load environment variables
     load_dotenv()
     
+    # Initialize the local gateway (reads OLLAMA_MODEL and OLLAMA_URL from .env)
+    # and probe Ollama in the background while the rest of the setup runs
+    gateway = LocalLLMGateway()
+    executor = ThreadPoolExecutor(max_workers=1)
+    status_future = executor.submit(gateway.get_status)
+    executor.shutdown(wait=False)
+    
     # Check for OpenAI API key
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key or api_key == "your-openai-api-key-here":
@@ -139,46 +150,48 @@ def run_demo():
         print("\nGet your API key at: https://platform.openai.com/api-keys")
         sys.exit(1)
     
-    # Initialize gateways (reads OLLAMA_MODEL and OLLAMA_URL from .env)
-    gateway = LocalLLMGateway()
     client = OpenAI(api_key=api_key)
     
     print_header()
     
     # Check Ollama prerequisites
-    if not check_prerequisites(gateway):
+    if not check_prerequisites(gateway, status_future.result()):
         print("\n💡 TIP: You can still use the regex-based version:")
         print("   python main.py")
         sys.exit(1)
     
+    # Load the model while the user is typing, so detection doesn't wait for it
+    threading.Thread(target=gateway.warm_up, daemon=True).start()
+    
     # Get user input
     user_prompt = get_user_input()
     
-    # Step 1: Local LLM detects and masks PII
+    # Step 1: Regex + local LLM detect and mask PII
     print("\n" + "=" * 70)
-    print("STEP 1: LOCAL LLM DETECTING & MASKING PII (Ollama)")
+    print("STEP 1: DETECTING & MASKING PII (Regex + Local LLM via Ollama)")
     print("=" * 70)
     
+    # Regex masks structured PII (cards, SSNs, emails, phones) instantly, so
+    # the local LLM only has to analyze the residual text for contextual PII
+    regex_masked, regex_mapping = PrivacyGateway().mask(user_prompt)
+    
     print("\n⏳ Analyzing text with local LLM (this may take a moment)...")
     
-    # First show detected PII
-    detected_pii = gateway.detect_pii(user_prompt)
+    detected_pii = gateway.detect_pii(regex_masked)
+    masked_prompt, llm_mapping = gateway.mask(regex_masked, detected_pii, reserved=regex_mapping)
+    mapping = {**regex_mapping, **llm_mapping}
+    pii_count = len(mapping)
     
-    print("\n🔍 PII DETECTED BY LOCAL LLM:")
+    print("\n🔍 PII DETECTED:")
     print("-" * 50)
-    pii_count = 0
-    for pii_type, values in detected_pii.items():
-        if values:
-            pii_count += len(values)
-            for value in values:
-                print(f"   [{pii_type.upper()}] {value}")
+    for placeholder, original in regex_mapping.items():
+        print(f"   {placeholder} {original}  (regex)")
+    for placeholder, original in llm_mapping.items():
+        print(f"   {placeholder} {original}  (local LLM)")
     
     if pii_count == 0:
         print("   No PII detected.")
     
-    # Mask the text
-    masked_prompt, mapping = gateway.mask(user_prompt)
-    
     print_section("ORIGINAL INPUT (contains PII)", user_prompt, "🔴")
     print_section("MASKED INPUT (safe to send to API)", masked_prompt, "🟢")
     
@@ -195,18 +208,26 @@ def run_demo():
     print("\n⏳ Sending masked prompt to OpenAI...")
     print("   (Only anonymized data is transmitted)")
     
-    ai_response = call_openai_api(client, masked_prompt)
+    # The response is unmasked and printed while it is still being generated
+    ai_response_parts = []
     
-    print_section("AI RESPONSE (with placeholders)", ai_response, "🤖")
+    def received():
+        for piece in stream_openai_api(client, masked_prompt):
+            ai_response_parts.append(piece)
+            yield piece
     
     # Step 3: Unmask the response
     print("\n" + "=" * 70)
-    print("STEP 3: UNMASKING RESPONSE (Local Processing)")
+    print("STEP 3: UNMASKING RESPONSE AS IT STREAMS (Local Processing)")
     print("=" * 70)
     
-    final_response = gateway.unmask(ai_response, mapping)
+    print("\n✨ FINAL RESPONSE (restored for user)")
+    print("-" * 50)
+    for text in unmask_stream(received(), mapping):
+        print(text, end="", flush=True)
+    print()
     
-    print_section("FINAL RESPONSE (restored for user)", final_response, "✨")
+    print_section("AI RESPONSE (with placeholders, as sent by OpenAI)", "".join(ai_response_parts), "🤖")
     
     # Summary
     print("\n" + "=" * 70)
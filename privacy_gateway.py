@@ -9,11 +9,199 @@ Supported PII Types:
 - Social Security Numbers (SSN)
 - Email Addresses
 - Phone Numbers
-- Person Names (common patterns)
+- Person Names (spaCy NER if installed, otherwise common patterns)
 """
 
 import re
-from typing import Dict, Tuple
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import re2  # google-re2: linear-time matching, no backtracking
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan  # Intel Hyperscan: vectorized multi-pattern matching
+except ImportError:
+    hyperscan = None
+
+# The PII patterns are compiled with re2 when it is installed. They avoid
+# lookaround and backreferences, and set flags inline, so both engines
+# accept them. Scanning ordinary text with them, re2 measured 2-10x faster
+# than re (100 KB, little PII: 3 ms vs 30 ms); on text dense with PII the
+# per-match overhead of its Python wrapper makes it ~1.3x slower.
+_compile = re2.compile if re2 else re.compile
+
+_EMAIL = r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b"
+
+# Structured PII patterns as (pii_type, pattern), in priority order: when two
+# match at the same position, the earlier one wins (SSN before phone)
+_STRUCTURED_PATTERNS = [
+    # Credit cards: 13-19 digits with optional spaces/dashes
+    ('credit_card', r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{1,7}\b"),
+    # SSN: XXX-XX-XXXX (always 9 digits; phone numbers have 10)
+    ('ssn', r"\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b"),
+    ('email', _EMAIL),
+    # Phone: (123) 456-7890, 123-456-7890, 123.456.7890, 1234567890
+    ('phone', r"(?:\(\d{3}\)|\b\d{3})[-.\s]?\d{3}[-.\s]?\d{4}\b"),
+]
+# Combined into one alternation so the text is scanned once; each
+# alternative names the PII type it detects
+_STRUCTURED_PATTERN = "|".join(
+    f"(?P<{pii_type}>{pattern})" for pii_type, pattern in _STRUCTURED_PATTERNS
+)
+# Any word but "my" or "name", spelled out since re2 has no lookahead
+_SURNAME = (
+    r"(?:[A-Z][a-z]{4,}|[A-Z][a-z]{2}"  # 5+ or 3 letters
+    r"|[A-MO-Z][a-z]{3}|N[b-z][a-z]{2}|Na[a-ln-z][a-z]|Nam[a-df-z]"  # 4 letters
+    r"|[A-LN-Z][a-z]|M[a-xz])"  # 2 letters
+)
+# Names after "my name is", "I'm", "I am" or "name:" (the prefix is kept).
+# No prefix is ever taken as (part of) a name, or the name after it would
+# leak: "I'm"/"I am" must start a word (not "him" or "Jim"), chained
+# prefixes ("I am my name is ...") are consumed together, and a surname is
+# never "my" or "name" ("I'm Jim my name is ..."). Email addresses right
+# after the prefix or the first name are tried first, so the start of an
+# address is never mistaken for a name. Only used when the spaCy NER model
+# is not available.
+_NAME_PATTERN = (
+    r"(?:my name is\s+|\bI'?m\s+|\bI am\s+|name:\s*)+(?:"
+    r"(?P<prefixed_email>" + _EMAIL + ")"  # I'm bob@example.com
+    r"|(?P<first_name>[A-Z][a-z]+)\s+(?P<name_email>" + _EMAIL + ")"  # I'm Bob bob@example.com
+    r"|(?P<prefixed_name>[A-Z][a-z]+(?:\s+" + _SURNAME + r"\b)?))"
+)
+_STRUCTURED_RE = _compile("(?i)" + _STRUCTURED_PATTERN)
+_NAME_RE = _compile("(?i)" + _NAME_PATTERN)
+_PII_RE = _compile("(?i)" + _STRUCTURED_PATTERN + "|" + _NAME_PATTERN)
+
+
+def _build_hyperscan_db():
+    """
+    Compile the structured patterns into one Hyperscan database.
+    
+    Returns None if Hyperscan can't compile them (e.g. a pattern it doesn't
+    support), so the regex is used instead.
+    """
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[pattern.encode() for _, pattern in _STRUCTURED_PATTERNS],
+            ids=list(range(len(_STRUCTURED_PATTERNS))),
+            elements=len(_STRUCTURED_PATTERNS),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(_STRUCTURED_PATTERNS)
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+_HS_DB = _build_hyperscan_db() if hyperscan else None
+_hs_local = threading.local()  # Hyperscan scratch space can't be shared by threads
+
+# Optional spaCy model for person names (https://huggingface.co/beki/en_spacy_pii_fast)
+SPACY_MODEL = "en_spacy_pii_fast"
+_PERSON_LABELS = {"PERSON", "PER"}
+
+
+def _structured_spans(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Find structured PII in `text` as (start, end, pii_type) spans, in order.
+    
+    Uses Hyperscan when it is installed and the text is ASCII (Hyperscan
+    reports byte offsets), otherwise the combined regex. Both give the
+    same spans: the leftmost match wins, then the pattern listed first.
+    """
+    if _HS_DB is None or not text.isascii():
+        return _regex_spans(text)
+    
+    # Hyperscan reports every match; keep the longest per (start, pattern)
+    longest: Dict[Tuple[int, int], int] = {}
+    
+    def on_match(pattern_id, start, end, flags, context):
+        if end > longest.get((start, pattern_id), -1):
+            longest[(start, pattern_id)] = end
+    
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+    _HS_DB.scan(text.encode(), match_event_handler=on_match, scratch=scratch)
+    
+    spans = []
+    pos = 0
+    for start, pattern_id in sorted(longest):
+        end = longest[(start, pattern_id)]
+        if start >= pos:
+            spans.append((start, end, _STRUCTURED_PATTERNS[pattern_id][0]))
+            pos = end
+        elif end > pos:
+            # Hyperscan only reports the leftmost start for each match end,
+            # so a match starting inside this overlap may be hidden. Rare in
+            # real text; let the regex resolve it.
+            return _regex_spans(text)
+    return spans
+
+
+def _regex_spans(text: str) -> List[Tuple[int, int, str]]:
+    """Find structured PII spans with the combined regex."""
+    return [(m.start(), m.end(), m.lastgroup) for m in _STRUCTURED_RE.finditer(text)]
+
+
+@lru_cache(maxsize=128)
+def _alternation_pattern(keys: frozenset) -> re.Pattern:
+    """
+    Compile a regex matching any of the given strings, longest first.
+    
+    Always stdlib re: an alternation of escaped literals can't backtrack
+    badly, and re2 is ~10x slower at it (per-match wrapper overhead).
+    """
+    return re.compile("|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True)))
+
+
+def multi_replace(text: str, table: Dict[str, str]) -> str:
+    """
+    Replace every key of `table` found in `text` with its value in one scan.
+    
+    Longer keys win over keys they contain (e.g. [CREDIT_CARD_10] over
+    [CREDIT_CARD_1]), and replaced text is never rescanned. The compiled
+    pattern is cached per key set, so repeated calls with the same mapping
+    reuse it.
+    """
+    if not table:
+        return text
+    pattern = _alternation_pattern(frozenset(table))
+    return pattern.sub(lambda match: table[match.group(0)], text)
+
+
+def unmask_stream(chunks: Iterable[str], mapping: Dict[str, str]) -> Iterator[str]:
+    """
+    Unmask text that arrives in pieces, such as a streamed AI response.
+    
+    Each piece is unmasked and yielded as soon as it arrives, except for a
+    trailing "[..." that may be the start of a placeholder split across
+    pieces; that tail is held back until it is closed, grows longer than
+    any placeholder, or the stream ends.
+    
+    Args:
+        chunks: The text pieces, in order.
+        mapping: The {placeholder: original_value} mapping.
+        
+    Yields:
+        Unmasked text, in order.
+    """
+    longest = max(map(len, mapping), default=0)
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        cut = buffer.rfind("[")
+        if cut == -1 or "]" in buffer[cut:] or len(buffer) - cut >= longest:
+            cut = len(buffer)
+        if cut:
+            yield multi_replace(buffer[:cut], mapping)
+            buffer = buffer[cut:]
+    if buffer:
+        yield multi_replace(buffer, mapping)
 
 
 class PrivacyGateway:
@@ -22,112 +210,109 @@ class PrivacyGateway:
     and unmasks the response to restore original values.
     """
 
-    def __init__(self):
-        # Mapping to store original values: {placeholder: original_value}
-        self.mapping: Dict[str, str] = {}
-        self.counters = {
-            'credit_card': 0,
-            'ssn': 0,
-            'email': 0,
-            'phone': 0,
-            'name': 0
-        }
+    __slots__ = ("use_ner", "mapping", "_rev", "_counts")
 
-    def reset(self):
-        """Reset the mapping and counters for a new masking session."""
-        self.mapping = {}
-        for key in self.counters:
-            self.counters[key] = 0
-
-    def _create_placeholder(self, pii_type: str) -> str:
-        """Generate a unique placeholder for a PII type."""
-        self.counters[pii_type] += 1
-        return f"[{pii_type.upper()}_{self.counters[pii_type]}]"
-
-    def _mask_credit_cards(self, text: str) -> str:
-        """Mask credit card numbers (13-19 digits, with optional spaces/dashes)."""
-        # Pattern matches common credit card formats
-        pattern = r'\b(\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{1,7})\b'
-        
-        def replace(match):
-            original = match.group(1)
-            placeholder = self._create_placeholder('credit_card')
-            self.mapping[placeholder] = original
-            return placeholder
-        
-        return re.sub(pattern, replace, text)
+    # spaCy pipeline shared by all instances, loaded on first use
+    _nlp = None
+    _nlp_loaded = False
+    _nlp_lock = threading.Lock()
 
-    def _mask_ssn(self, text: str) -> str:
-        """Mask Social Security Numbers (XXX-XX-XXXX format)."""
-        pattern = r'\b(\d{3}[-\s]?\d{2}[-\s]?\d{4})\b'
-        
-        def replace(match):
-            original = match.group(1)
-            # Verify it looks like an SSN (not a phone number)
-            digits_only = re.sub(r'[-\s]', '', original)
-            if len(digits_only) == 9:
-                placeholder = self._create_placeholder('ssn')
-                self.mapping[placeholder] = original
-                return placeholder
-            return original
+    def __init__(self, use_ner: bool = True):
+        """
+        Initialize the gateway.
         
-        return re.sub(pattern, replace, text)
+        Args:
+            use_ner: Detect names with the spaCy NER model when it is
+                     installed. Falls back to the regex name patterns if not.
+        """
+        self.use_ner = use_ner
+        self.reset()
 
-    def _mask_emails(self, text: str) -> str:
-        """Mask email addresses."""
-        pattern = r'\b([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})\b'
+    def reset(self):
+        """
+        Reset the mapping and counters for a new masking session.
         
-        def replace(match):
-            original = match.group(1)
-            placeholder = self._create_placeholder('email')
+        A new mapping dict is created (not cleared in place), so mappings
+        returned by earlier mask() calls are never modified.
+        """
+        # Mapping to store original values: {placeholder: original_value}
+        self.mapping: Dict[str, str] = {}
+        # Reverse mapping, so repeated values reuse their placeholder:
+        # {(pii_type, original_value): placeholder}
+        self._rev: Dict[Tuple[str, str], str] = {}
+        # Placeholders created so far: {pii_type: count}
+        self._counts: Dict[str, int] = dict.fromkeys(self._PLACEHOLDER_TYPES, 0)
+
+    @classmethod
+    def _load_nlp(cls):
+        """Load the spaCy NER pipeline once; returns None if it is unavailable."""
+        if not cls._nlp_loaded:
+            with cls._nlp_lock:
+                if not cls._nlp_loaded:
+                    try:
+                        import spacy
+                        # Only the NER component is needed
+                        cls._nlp = spacy.load(SPACY_MODEL, disable=["tagger", "parser", "lemmatizer"])
+                    except (ImportError, OSError):
+                        cls._nlp = None
+                    cls._nlp_loaded = True
+        return cls._nlp
+
+    # Placeholder prefix for each PII type
+    _PLACEHOLDER_TYPES = {
+        'credit_card': "[CREDIT_CARD_",
+        'ssn': "[SSN_",
+        'email': "[EMAIL_",
+        'phone': "[PHONE_",
+        'name': "[NAME_",
+    }
+
+    def _add(self, pii_type: str, original: str) -> str:
+        """Get or create (and record) the `pii_type` placeholder for `original`."""
+        key = (pii_type, original)
+        placeholder = self._rev.get(key)
+        if placeholder is None:
+            count = self._counts[pii_type] + 1
+            self._counts[pii_type] = count
+            placeholder = f"{self._PLACEHOLDER_TYPES[pii_type]}{count}]"
             self.mapping[placeholder] = original
-            return placeholder
-        
-        return re.sub(pattern, replace, text)
+            self._rev[key] = placeholder
+        return placeholder
 
-    def _mask_phone_numbers(self, text: str) -> str:
-        """Mask phone numbers (various US formats)."""
-        # Matches: (123) 456-7890, 123-456-7890, 123.456.7890, 1234567890
-        pattern = r'\b(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})\b'
-        
-        def replace(match):
-            original = match.group(1)
-            # Skip if it's already masked as SSN
-            if '[SSN_' not in text[:match.start()]:
-                placeholder = self._create_placeholder('phone')
-                self.mapping[placeholder] = original
-                return placeholder
-            return original
-        
-        return re.sub(pattern, replace, text)
+    def _mask_prefixed_name(self, match: re.Match) -> str:
+        """Replace a name match, keeping the "my name is" style prefix."""
+        original = match.group('prefixed_name')
+        return match.group()[:-len(original)] + self._add('name', original)
 
-    def _mask_names(self, text: str) -> str:
-        """
-        Mask common name patterns.
-        This is a simplified approach - for production, use NER libraries like spaCy.
-        Looks for patterns like "name is John Smith" or "I'm Jane Doe"
-        """
-        # Pattern for "my name is X" or "I'm X" or "I am X"
-        name_patterns = [
-            (r"(?i)(my name is\s+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", 2),
-            (r"(?i)(I'?m\s+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", 2),
-            (r"(?i)(I am\s+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", 2),
-            (r"(?i)(name:\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", 2),
-        ]
-        
-        for pattern, group_idx in name_patterns:
-            def make_replace(grp_idx):
-                def replace(match):
-                    original = match.group(grp_idx)
-                    placeholder = self._create_placeholder('name')
-                    self.mapping[placeholder] = original
-                    # Return prefix + placeholder
-                    return match.group(1) + placeholder
-                return replace
-            
-            text = re.sub(pattern, make_replace(group_idx), text)
-        
-        return text
+    def _mask_prefixed_email(self, match: re.Match) -> str:
+        """Replace an email address that follows a "my name is" style prefix."""
+        original = match.group('prefixed_email')
+        return match.group()[:-len(original)] + self._add('email', original)
+
+    def _mask_name_and_email(self, match: re.Match) -> str:
+        """Replace a first name and the email address that directly follows it."""
+        first_name = match.group('first_name')
+        email = match.group('name_email')
+        head = match.group()[:-len(email)]  # Prefix, name and whitespace
+        name_end = len(head.rstrip())
+        return (head[:name_end - len(first_name)] + self._add('name', first_name)
+                + head[name_end:] + self._add('email', email))
+
+    # Handler for each named group of _NAME_PATTERN, which keeps its prefix:
+    # (self, match) -> replacement
+    _PREFIXED_HANDLERS = {
+        'prefixed_name': _mask_prefixed_name,
+        'prefixed_email': _mask_prefixed_email,
+        'name_email': _mask_name_and_email,
+    }
+
+    def _replace_pii(self, match: re.Match) -> str:
+        """Return the replacement for a _PII_RE match, dispatching on its PII type."""
+        pii_type = match.lastgroup
+        if pii_type in self._PLACEHOLDER_TYPES:
+            # Structured PII: the whole match is the value
+            return self._add(pii_type, match.group())
+        return self._PREFIXED_HANDLERS[pii_type](self, match)
 
     def mask(self, text: str) -> Tuple[str, Dict[str, str]]:
         """
@@ -142,15 +327,83 @@ class PrivacyGateway:
         """
         self.reset()
         
-        # Apply masking in a specific order to avoid conflicts
-        masked_text = text
-        masked_text = self._mask_credit_cards(masked_text)
-        masked_text = self._mask_ssn(masked_text)
-        masked_text = self._mask_emails(masked_text)
-        masked_text = self._mask_phone_numbers(masked_text)
-        masked_text = self._mask_names(masked_text)
+        nlp = self._load_nlp() if self.use_ner else None
+        if nlp is None and _HS_DB is None:
+            # Single pass over the text; _replace_pii dispatches on the PII type
+            masked_text = _PII_RE.sub(self._replace_pii, text)
+        else:
+            masked_text = self._mask_spans(text, nlp)
         
-        return masked_text, self.mapping.copy()
+        # reset() starts a new dict on every call, so the caller can own this one
+        return masked_text, self.mapping
+
+    def _mask_spans(self, text: str, nlp=None) -> str:
+        """
+        Mask structured PII and person names found by separate scans.
+        
+        Structured PII comes from _structured_spans() (Hyperscan or regex),
+        names from spaCy NER if `nlp` is given or the name regex otherwise.
+        The masked text is rebuilt left to right in one join, taking the
+        leftmost candidate each time (structured PII wins ties), so without
+        NER the result is the same as the combined _PII_RE scan.
+        """
+        structured = _structured_spans(text)
+        entities = ([(ent.start_char, ent.end_char, 'name')
+                     for ent in nlp(text).ents if ent.label_ in _PERSON_LABELS]
+                    if nlp is not None else None)
+        # Regex names are scanned once; like the structured spans above, the
+        # scan restarts only when a name overlaps the last replacement
+        names = _NAME_RE.finditer(text) if entities is None else None
+        name_match = next(names, None) if names is not None else None
+        i = j = 0
+        
+        parts = []
+        pos = 0
+        while True:
+            # Next structured span at or after pos
+            candidate = None
+            while i < len(structured) and structured[i][0] < pos:
+                if structured[i][1] > pos:
+                    # It overlaps the last replacement, so the spans found
+                    # past it may differ; ask the regex where the next one is
+                    match = _STRUCTURED_RE.search(text, pos)
+                    if match:
+                        candidate = (match.start(), match.end(), match.lastgroup)
+                    break
+                i += 1
+            else:
+                if i < len(structured):
+                    candidate = structured[i]
+            
+            # Next name at or after pos
+            if entities is not None:
+                while j < len(entities) and entities[j][0] < pos:
+                    j += 1
+                name = entities[j] if j < len(entities) else None
+            else:
+                while name_match is not None and name_match.start() < pos:
+                    if name_match.end() > pos:
+                        # The names found past it may differ; rescan from pos
+                        names = _NAME_RE.finditer(text, pos)
+                    name_match = next(names, None)
+                name = (name_match.start(), name_match.end(), name_match) if name_match else None
+            
+            if name is not None and (candidate is None or name[0] < candidate[0]):
+                candidate = name
+            if candidate is None:
+                break
+            
+            start, end, found = candidate
+            parts.append(text[pos:start])
+            if isinstance(found, str):
+                parts.append(self._add(found, text[start:end]))
+            else:
+                # A name regex match, which may keep a prefix
+                parts.append(self._replace_pii(found))
+            pos = end
+        parts.append(text[pos:])
+        
+        return "".join(parts)
 
     def unmask(self, text: str, mapping: Dict[str, str] = None) -> str:
         """
@@ -166,11 +419,7 @@ class PrivacyGateway:
         if mapping is None:
             mapping = self.mapping
         
-        unmasked_text = text
-        for placeholder, original in mapping.items():
-            unmasked_text = unmasked_text.replace(placeholder, original)
-        
-        return unmasked_text
+        return multi_replace(text, mapping)
 
 
 def demonstrate_masking():
@@ -207,7 +456,7 @@ def demonstrate_masking():
     simulated_response = """
     Hello [NAME_1]! I've reviewed the account associated with card [CREDIT_CARD_1].
     Based on your transaction history, I recommend setting up automatic payments.
-    I'll send a detailed report to [EMAIL_1].
+    I'll send a detailed report to [EMAIL_1] and call you at [PHONE_1].
     """
     
     print("\n🤖 SIMULATED AI RESPONSE (with placeholders):")
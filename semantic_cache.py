@@ -0,0 +1,129 @@
+"""
+Semantic Response Cache
+=======================
+An optional cache that reuses AI responses for prompts that are worded
+differently but mean the same thing, e.g. "How do I report a stolen card?"
+and "How can I report my stolen card?".
+
+Prompts are embedded with a small sentence-transformers model and looked up
+by cosine similarity in a FAISS index. A hit is only returned when the
+cached prompt used exactly the same placeholders, so the cached response
+can be unmasked with the mapping of the request that hits it.
+
+Masked text is not PII-free: any PII the masking step missed is embedded,
+and stored with the response to that prompt. Unlike an exact-match hit, a
+similar-prompt hit serves a response written for a different (possibly
+another user's) prompt, which can carry that prompt's unmasked details.
+Only use it for prompts masked by the local LLM detector, which covers
+far more PII types than the regex gateway, and only where responses may
+be shared between users.
+
+Requires the optional packages sentence-transformers and faiss-cpu.
+"""
+
+import re
+import threading
+from collections import deque
+from typing import Optional
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_THRESHOLD = 0.95
+
+# Nearest neighbours checked per lookup (the closest may use other placeholders)
+_CANDIDATES = 4
+
+_PLACEHOLDER_RE = re.compile(r'\[[A-Z_]+_\d+\]')
+
+
+class SemanticCache:
+    """
+    A bounded similarity cache from masked prompts to masked AI responses.
+
+    When full, the oldest entry is evicted.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL,
+                 threshold: float = DEFAULT_THRESHOLD, maxsize: int = 1024):
+        """
+        Load the embedding model and create an empty index.
+
+        Args:
+            model_name: sentence-transformers model used to embed prompts
+            threshold: Minimum cosine similarity for a cache hit
+            maxsize: Maximum number of cached responses
+
+        Raises:
+            ImportError: If sentence-transformers or faiss is not installed
+        """
+        import faiss
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+
+        self._np = np
+        self._model = SentenceTransformer(model_name)
+        dimension = self._model.get_sentence_embedding_dimension()
+        # Inner product of normalized vectors is their cosine similarity
+        self._index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+        self._entries = {}  # id -> (placeholders, response)
+        self._order = deque()  # ids, oldest first
+        self._next_id = 0
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def _embed(self, masked_text: str):
+        """Embed a prompt as a normalized 1 x dimension float32 matrix."""
+        vector = self._model.encode([masked_text], normalize_embeddings=True)
+        return self._np.asarray(vector, dtype="float32")
+
+    def get(self, masked_text: str) -> Optional[str]:
+        """
+        Return the cached response for a similar prompt, or None.
+
+        Args:
+            masked_text: The masked prompt
+
+        Returns:
+            The masked response of the most similar cached prompt that uses
+            the same placeholders, if its similarity reaches the threshold
+        """
+        placeholders = frozenset(_PLACEHOLDER_RE.findall(masked_text))
+        vector = self._embed(masked_text)
+
+        with self._lock:
+            if not self._entries:
+                return None
+            scores, ids = self._index.search(vector, min(_CANDIDATES, len(self._entries)))
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id == -1 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is not None and entry[0] == placeholders:
+                    return entry[1]
+        return None
+
+    def put(self, masked_text: str, response: str):
+        """
+        Cache the masked response for a masked prompt.
+
+        Args:
+            masked_text: The masked prompt
+            response: The AI response to it (still containing placeholders)
+        """
+        placeholders = frozenset(_PLACEHOLDER_RE.findall(masked_text))
+        vector = self._embed(masked_text)
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, self._np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = (placeholders, response)
+            self._order.append(entry_id)
+
+            if len(self._order) > self.maxsize:
+                oldest = self._order.popleft()
+                self._index.remove_ids(self._np.array([oldest], dtype="int64"))
+                del self._entries[oldest]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,78 @@
+"""
+Tests for LocalLLMGateway's local (no Ollama call) masking helpers.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import unittest
+
+from local_llm_gateway import LocalLLMGateway, _JsonObjectTracker, _split_into_chunks
+
+class MaskTest(unittest.TestCase):
+
+    def test_existing_placeholders_untouched(self):
+        """A detected value that only occurs inside a placeholder is not masked."""
+        gateway = LocalLLMGateway()
+        masked, mapping = gateway.mask(
+            "Call [PHONE_1] Bob",
+            {"phone_numbers": ["PHONE_1"], "names": ["Bob"]},
+            reserved={"[PHONE_1]": "x"},
+        )
+        self.assertEqual(masked, "Call [PHONE_1] [NAMES_1]")
+        self.assertEqual(mapping, {"[NAMES_1]": "Bob"})
+
+    def test_value_inside_and_outside_placeholder(self):
+        """Only the occurrences outside a placeholder are replaced."""
+        gateway = LocalLLMGateway()
+        masked, mapping = gateway.mask(
+            "[NAME_1] met NAME at [EMAIL_2].",
+            {"names": ["NAME"]},
+            reserved={"[NAME_1]": "Ann", "[EMAIL_2]": "ann@example.com"},
+        )
+        self.assertEqual(masked, "[NAME_1] met [NAMES_1] at [EMAIL_2].")
+        self.assertEqual(mapping, {"[NAMES_1]": "NAME"})
+
+class SplitIntoChunksTest(unittest.TestCase):
+
+    def test_chunks_are_slices(self):
+        """Chunks are consecutive slices of the input, whitespace included."""
+        text = "Call  Bob at 555-123-4567.  Mail\tbob@example.com!\nHe is\n\nhere? Yes."
+        chunks = _split_into_chunks(text, 30)
+        self.assertGreater(len(chunks), 1)
+        pos = 0
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 30)
+            start = text.index(chunk, pos)
+            self.assertEqual(text[pos:start].strip(), "")  # Only the break between chunks
+            pos = start + len(chunk)
+        self.assertEqual(pos, len(text))
+
+    def test_long_sentence_kept_whole(self):
+        """A sentence longer than max_chars is its own chunk, not cut."""
+        long_sentence = "My card number is 4111 1111 1111 1111 and it expires soon."
+        self.assertEqual(
+            _split_into_chunks(f"Hi. {long_sentence} Bye.", 20),
+            ["Hi.", long_sentence, "Bye."],
+        )
+        self.assertEqual(_split_into_chunks(long_sentence, 20), [long_sentence])
+
+    def test_empty_input(self):
+        self.assertEqual(_split_into_chunks("", 20), [])
+
+class JsonObjectTrackerTest(unittest.TestCase):
+
+    def test_braces_and_escaped_quotes_in_strings(self):
+        """Braces and escaped quotes inside JSON strings don't end the object."""
+        tracker = _JsonObjectTracker()
+        self.assertFalse(tracker.feed('{"text": "a } and \\" {", "names": ["}\\\\"]'))
+        self.assertTrue(tracker.feed("}"))
+
+    def test_object_split_across_fragments(self):
+        tracker = _JsonObjectTracker()
+        # The escape before the quote in "a \" }" arrives in the previous fragment
+        fragments = ['Sure: {"mapping": {"[NAME', '_1]": "B', 'ob"}', ', "note": "a \\', '" }"', '}']
+        done = [tracker.feed(fragment) for fragment in fragments]
+        self.assertEqual(done, [False, False, False, False, False, True])
+
+if __name__ == "__main__":
+    unittest.main()
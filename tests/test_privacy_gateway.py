@@ -0,0 +1,163 @@
+"""
+Regression tests for PrivacyGateway's regex name detection.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import random
+import unittest
+from unittest import mock
+
+import privacy_gateway
+from privacy_gateway import PrivacyGateway, unmask_stream
+
+# (text, expected masked text, expected mapping)
+PREFIXED_NAME_CASES = [
+    # "him"/"Jim" end in "im" but are not an "I'm" prefix
+    ("Please tell him my name is Bob Smith",
+     "Please tell him my name is [NAME_1]", {"[NAME_1]": "Bob Smith"}),
+    ("Hi Jim my name is Bob Smith",
+     "Hi Jim my name is [NAME_1]", {"[NAME_1]": "Bob Smith"}),
+    # A prefix is never taken as (part of) the name
+    ("I am my name is Bob",
+     "I am my name is [NAME_1]", {"[NAME_1]": "Bob"}),
+    ("I'm Jim my name is Bob",
+     "I'm [NAME_1] my name is [NAME_2]", {"[NAME_1]": "Jim", "[NAME_2]": "Bob"}),
+    ("I'm Bob bob@example.com",
+     "I'm [NAME_1] [EMAIL_1]", {"[NAME_1]": "Bob", "[EMAIL_1]": "bob@example.com"}),
+]
+
+
+class PrefixedNameTest(unittest.TestCase):
+
+    def test_single_pass(self):
+        """The combined _PII_RE scan (no NER, no Hyperscan)."""
+        with mock.patch.object(privacy_gateway, "_HS_DB", None):
+            for text, expected_text, expected_mapping in PREFIXED_NAME_CASES:
+                with self.subTest(text=text):
+                    gateway = PrivacyGateway(use_ner=False)
+                    self.assertEqual(gateway.mask(text), (expected_text, expected_mapping))
+
+    def test_separate_scans(self):
+        """The separate structured and name scans (used with Hyperscan)."""
+        for text, expected_text, expected_mapping in PREFIXED_NAME_CASES:
+            with self.subTest(text=text):
+                gateway = PrivacyGateway(use_ner=False)
+                self.assertEqual(gateway._mask_spans(text), expected_text)
+                self.assertEqual(gateway.mapping, expected_mapping)
+
+
+# (text, expected masked text, expected mapping)
+STRUCTURED_CASES = [
+    # A phone number after an SSN is not skipped
+    ("123-45-6789 and 555-123-4567",
+     "[SSN_1] and [PHONE_1]", {"[SSN_1]": "123-45-6789", "[PHONE_1]": "555-123-4567"}),
+    # The area code in parentheses is part of the phone number
+    ("(555) 123-4567", "[PHONE_1]", {"[PHONE_1]": "(555) 123-4567"}),
+]
+
+class StructuredTest(unittest.TestCase):
+
+    def test_single_pass(self):
+        with mock.patch.object(privacy_gateway, "_HS_DB", None):
+            for text, expected_text, expected_mapping in STRUCTURED_CASES:
+                with self.subTest(text=text):
+                    gateway = PrivacyGateway(use_ner=False)
+                    self.assertEqual(gateway.mask(text), (expected_text, expected_mapping))
+
+    def test_separate_scans(self):
+        for text, expected_text, expected_mapping in STRUCTURED_CASES:
+            with self.subTest(text=text):
+                gateway = PrivacyGateway(use_ner=False)
+                self.assertEqual(gateway._mask_spans(text), expected_text)
+                self.assertEqual(gateway.mapping, expected_mapping)
+
+class RepeatedValueTest(unittest.TestCase):
+
+    TEXT = ("Mail bob@example.com or call 555-123-4567. "
+            "Again: bob@example.com, 555-123-4567.")
+    EXPECTED = ("Mail [EMAIL_1] or call [PHONE_1]. Again: [EMAIL_1], [PHONE_1].",
+                {"[EMAIL_1]": "bob@example.com", "[PHONE_1]": "555-123-4567"})
+
+    def test_single_pass(self):
+        """A repeated value reuses its placeholder and gets one mapping entry."""
+        with mock.patch.object(privacy_gateway, "_HS_DB", None):
+            gateway = PrivacyGateway(use_ner=False)
+            self.assertEqual(gateway.mask(self.TEXT), self.EXPECTED)
+
+    def test_separate_scans(self):
+        gateway = PrivacyGateway(use_ner=False)
+        self.assertEqual((gateway._mask_spans(self.TEXT), gateway.mapping), self.EXPECTED)
+
+# Overlapping structured matches, prefixes next to PII, and non-ASCII text
+# (which the Hyperscan scan skips)
+MIXED_CASES = [
+    "5551234567 4111 1111 1111 1111",
+    "4111-1111-1111-1111-555-123-4567",
+    "123-45-6789-4567 and (555) 123-4567",
+    "my name is Bob 555.123.4567bob@x.io",
+    "I'm Bob, name: Bob Jones 123-45-6789",
+    "I'm José, call 555-123-4567",
+    "name: Zoë Smith zoë@example.com 123-45-6789",
+    "Ünïcode I am Ann Lee and my name is Ann",
+]
+
+# Tokens for generated inputs
+MIXED_TOKENS = [
+    "I'm", "I am", "my name is", "name:", "him", "Jim", "Bob", "bob", "Jones",
+    "Smith", "José", "bob@x.io", "a.b@c.de", "555-123-4567", "(555) 123-4567",
+    "5551234567", "123-45-6789", "4111 1111 1111 1111", " ", ",", ".", "\n", "x",
+]
+
+class EquivalenceTest(unittest.TestCase):
+
+    def assert_equivalent(self, text):
+        single = PrivacyGateway(use_ner=False)
+        with mock.patch.object(privacy_gateway, "_HS_DB", None):
+            result = single.mask(text)
+        spans = PrivacyGateway(use_ner=False)
+        self.assertEqual((spans._mask_spans(text), spans.mapping), result)
+
+    def test_mixed_cases(self):
+        """The single pass and the separate scans mask the same way."""
+        for text in MIXED_CASES:
+            with self.subTest(text=text):
+                self.assert_equivalent(text)
+
+    def test_generated_inputs(self):
+        rng = random.Random(7)
+        for _ in range(2000):
+            text = "".join(
+                rng.choice(MIXED_TOKENS) + rng.choice(["", " "])
+                for _ in range(rng.randint(0, 14))
+            )
+            with self.subTest(text=text):
+                self.assert_equivalent(text)
+
+class UnmaskStreamTest(unittest.TestCase):
+
+    MAPPING = {"[NAME_1]": "Bob", "[EMAIL_12]": "bob@example.com"}
+
+    def unmask(self, chunks):
+        return list(unmask_stream(chunks, self.MAPPING))
+
+    def test_placeholder_split_across_chunks(self):
+        self.assertEqual(
+            self.unmask(["Hi [NA", "ME_1], mail [EMAIL_", "12]."]),
+            ["Hi ", "Bob, mail ", "bob@example.com."],
+        )
+
+    def test_trailing_bracket_at_end_of_stream(self):
+        """A "[" held back as a possible placeholder is flushed when the stream ends."""
+        self.assertEqual(self.unmask(["Hi [NAME_1] ["]), ["Hi Bob ", "["])
+
+    def test_stray_bracket(self):
+        """A "[x" that is not a placeholder is released once it outgrows any placeholder."""
+        self.assertEqual(
+            self.unmask(["a [x", "yz and more", " [NAME_1]"]),
+            ["a ", "[xyz and more", " Bob"],
+        )
+        self.assertEqual(self.unmask(["a [x"]), ["a ", "[x"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Web UI Common Code
+==================
+Pieces shared by the Quart web UIs (app.py and app_simple.py): the orjson
+JSON provider and the cached, prompt-cache-warmed OpenAI call.
+"""
+
+import asyncio
+import logging
+import os
+from functools import lru_cache
+
+import orjson
+from openai import AsyncOpenAI
+from quart.json.provider import DefaultJSONProvider
+from quart.utils import run_sync
+
+from cache import LRUCache, cache_key
+from prompts import SYSTEM_PROMPT
+from semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+# Model for the OpenAI call
+OPENAI_MODEL = "gpt-4o-mini"
+
+# Masked prompt -> masked AI response. Masking strips the varying PII, so
+# repeated templated inputs hit the cache even for different users.
+response_cache = LRUCache(maxsize=1024)
+
+# Fire-and-forget startup tasks, referenced so they aren't garbage collected
+_background_tasks = set()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, which encodes large responses much faster."""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_INDENT_2 if kwargs.get("indent") else 0
+        return orjson.dumps(obj, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+@lru_cache(maxsize=1)
+def get_openai_client():
+    """Get the shared async OpenAI client (created once, reused by all requests)."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or api_key == "your-openai-api-key-here":
+        return None
+    return AsyncOpenAI(api_key=api_key)
+
+
+@lru_cache(maxsize=1)
+def get_semantic_cache():
+    """Get the shared semantic cache, or None unless SEMANTIC_CACHE is enabled."""
+    if os.getenv("SEMANTIC_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    try:
+        return SemanticCache()  # Loads the embedding model
+    except ImportError:
+        logger.warning("SEMANTIC_CACHE is set but sentence-transformers/faiss is not installed")
+        return None
+
+
+def start_prompt_cache_warmup():
+    """Seed OpenAI's prompt cache in the background, if a client is configured."""
+    client = get_openai_client()
+    if client is not None:
+        task = asyncio.create_task(warm_openai_prompt_cache(client))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def warm_openai_prompt_cache(client):
+    """Send a 1-token request so OpenAI caches the SYSTEM_PROMPT prefix before real traffic."""
+    try:
+        await client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": "warmup"
+                }
+            ],
+            max_tokens=1
+        )
+    except Exception as e:
+        logger.warning("OpenAI prompt cache warm-up failed: %s", e)
+
+
+async def ask_openai(client, masked_input: str, use_semantic_cache: bool = False) -> str:
+    """
+    Send a masked prompt to OpenAI, reusing the cached response for repeats.
+    
+    With `use_semantic_cache`, responses to similar prompts are reused as
+    well. Only pass it for prompts masked by the local LLM: the regex
+    gateway leaves too much PII in the text (see semantic_cache.py).
+    """
+    key = cache_key(OPENAI_MODEL, SYSTEM_PROMPT, masked_input)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    semantic = get_semantic_cache() if use_semantic_cache else None
+    if semantic is not None:
+        cached = await run_sync(semantic.get)(masked_input)
+        if cached is not None:
+            response_cache.put(key, cached)
+            return cached
+    
+    response = await client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": masked_input
+            }
+        ],
+        max_tokens=300,
+        temperature=0.7
+    )
+    content = response.choices[0].message.content
+    if content is not None:
+        response_cache.put(key, content)
+        if semantic is not None:
+            await run_sync(semantic.put)(masked_input, content)
+    return content